@@ -1,7 +1,14 @@
+import json
+import re
+
 import frappe
 from frappe.utils import now_datetime
 from .utils import get_effective_work_site, compute_geofence_flag, hash_fingerprint
 
+# Matches a plain signed decimal number; validating with this instead of
+# try/except float(...) keeps exception handling off the happy path
+_NUM = re.compile(r'^-?\d+(\.\d+)?$')
+
 @frappe.whitelist()
 def get_employee_for_user():
     """
@@ -26,27 +33,32 @@ def mobile_checkin(direction, lat, lng, accuracy=None, fingerprint_raw=None):
     if user in ("Guest", None):
         frappe.throw("You must be logged in to clock in/out")
 
-    employee = frappe.db.get_value("Employee", {"user_id": user}, "name")
-    if not employee:
+    # Fetch everything needed from Employee in one query
+    emp = frappe.db.get_value(
+        "Employee", {"user_id": user}, ["name", "default_work_site"], as_dict=True
+    )
+    if not emp:
         frappe.throw("No Employee linked to this user")
+    employee = emp.name
 
-    try:
-        lat = float(lat)
-        lng = float(lng)
-    except Exception:
+    if not _NUM.match(str(lat)) or not _NUM.match(str(lng)):
         frappe.throw("Invalid latitude/longitude")
+    lat = float(lat)
+    lng = float(lng)
+
+    accuracy = float(accuracy) if accuracy and _NUM.match(str(accuracy)) else None
 
-    work_site = get_effective_work_site(employee)
+    work_site = get_effective_work_site(employee, default_work_site=emp.default_work_site)
     within_geofence = compute_geofence_flag(work_site, lat, lng)
 
     # Parse fingerprint_raw from JSON string if needed
-    import json
     try:
         raw_obj = json.loads(fingerprint_raw) if isinstance(fingerprint_raw, str) else (fingerprint_raw or {})
     except Exception:
         raw_obj = {}
 
-    fingerprint = hash_fingerprint(raw_obj, frappe.local.request)
+    request = getattr(frappe.local, "request", None)
+    fingerprint = hash_fingerprint(raw_obj, request)
 
     doc = frappe.get_doc({
         "doctype": "Mobile Checkin",
@@ -55,15 +67,16 @@ def mobile_checkin(direction, lat, lng, accuracy=None, fingerprint_raw=None):
         "direction": direction,
         "latitude": lat,
         "longitude": lng,
-        "gps_accuracy": float(accuracy) if accuracy else None,
+        "gps_accuracy": accuracy,
         "work_site": work_site,
         "within_geofence": 1 if within_geofence else 0,
         "device_fingerprint": fingerprint,
         "ip_address": getattr(frappe.local, "request_ip", None),
-        "user_agent": frappe.local.request.headers.get("User-Agent") if getattr(frappe.local, "request", None) else "",
+        "user_agent": request.headers.get("User-Agent") if request else "",
         "owner_user": user,
     })
     doc.insert(ignore_permissions=True)
-    frappe.db.commit()
+    # No explicit commit: Frappe commits the transaction when the request
+    # succeeds, so forcing one here only adds an extra fsync per checkin.
 
     return {"status": "success", "within_geofence": within_geofence}
@@ -16,6 +16,13 @@ doctype_js = {
 # Include fixtures if you later want to export roles/permissions, etc.
 fixtures = []
 
+doc_events = {
+    "Biometric Device Settings": {
+        # The enabled-device list is Redis-cached for device syncs
+        "on_update": "advanced_attendance.zkteco_connector.clear_device_cache"
+    }
+}
+
 # Scheduler events
 scheduler_events = {
     "cron": {
@@ -28,9 +35,9 @@ scheduler_events = {
         "advanced_attendance.tasks.process_attendance_punches"
     ],
     "daily": [
-        "advanced_attendance.tasks.generate_daily_anomaly_snapshot",
-        "advanced_attendance.overtime_calculator.process_daily_overtime",
-        "advanced_attendance.notifications.send_daily_anomaly_summary"
+        # Runs anomaly snapshot, overtime processing and anomaly summary
+        # in one worker boot
+        "advanced_attendance.tasks.run_daily_batch"
     ]
 }
 # Website routes (clock-in page is under www/clock_in.html so no extra config needed)
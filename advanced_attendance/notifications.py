@@ -21,8 +21,13 @@ def send_geofence_violation_alert(attendance_doc):
     if not attendance_doc.has_outside_geofence_checkin:
         return
     
-    # Get employee details
-    employee = frappe.get_doc('Employee', attendance_doc.employee)
+    # Get only the employee fields the alert actually reads
+    employee = frappe.get_cached_value(
+        'Employee',
+        attendance_doc.employee,
+        ['employee_name', 'company', 'default_work_site', 'reports_to'],
+        as_dict=True
+    )
     
     # Get HR Manager emails
     recipients = get_hr_manager_emails(employee.company)
@@ -32,34 +37,29 @@ def send_geofence_violation_alert(attendance_doc):
     
     # Prepare email content
     subject = f"Geofence Violation Alert: {employee.employee_name}"
+
+    message = frappe.render_template('templates/emails/geofence_violation.html', {
+        'employee': attendance_doc.employee,
+        'employee_name': employee.employee_name,
+        'attendance_date': attendance_doc.attendance_date,
+        'department': attendance_doc.department,
+        'work_site': employee.default_work_site,
+        'attendance_name': attendance_doc.name,
+        'base_url': frappe.utils.get_url(),
+    })
     
-    message = f"""
-    <h3>Geofence Violation Detected</h3>
-    
-    <p><strong>Employee:</strong> {employee.employee_name} ({attendance_doc.employee})</p>
-    <p><strong>Date:</strong> {attendance_doc.attendance_date}</p>
-    <p><strong>Department:</strong> {attendance_doc.department or 'N/A'}</p>
-    <p><strong>Expected Work Site:</strong> {employee.default_work_site or 'Not Set'}</p>
-    
-    <p>This employee checked in from a location outside the designated geofence boundary.</p>
-    
-    <p><a href="{frappe.utils.get_url()}/app/attendance/{attendance_doc.name}">View Attendance Record</a></p>
-    
-    <p style="color: #666; font-size: 12px;">
-    This is an automated alert from the Advanced Attendance System.
-    </p>
-    """
-    
-    # Send email
-    frappe.sendmail(
+    # Queue email so SMTP latency never blocks the calling request
+    frappe.enqueue(
+        'frappe.sendmail',
+        queue='short',
         recipients=recipients,
         subject=subject,
         message=message,
         reference_doctype='Attendance',
         reference_name=attendance_doc.name
     )
-    
-    frappe.log_error(f"Geofence violation alert sent for {attendance_doc.name}", "Geofence Alert")
+
+    frappe.logger().info(f"Geofence violation alert queued for {attendance_doc.name}")
 
 
 def send_device_anomaly_alert(attendance_doc):
@@ -72,8 +72,13 @@ def send_device_anomaly_alert(attendance_doc):
     if not attendance_doc.device_fingerprint_anomaly:
         return
     
-    # Get employee details
-    employee = frappe.get_doc('Employee', attendance_doc.employee)
+    # Get only the employee fields the alert actually reads
+    employee = frappe.get_cached_value(
+        'Employee',
+        attendance_doc.employee,
+        ['employee_name', 'company', 'default_work_site', 'reports_to'],
+        as_dict=True
+    )
     
     # Get HR Manager emails
     recipients = get_hr_manager_emails(employee.company)
@@ -83,36 +88,28 @@ def send_device_anomaly_alert(attendance_doc):
     
     # Prepare email content
     subject = f"Device Anomaly Alert: {employee.employee_name}"
+
+    message = frappe.render_template('templates/emails/device_anomaly.html', {
+        'employee': attendance_doc.employee,
+        'employee_name': employee.employee_name,
+        'attendance_date': attendance_doc.attendance_date,
+        'department': attendance_doc.department,
+        'attendance_name': attendance_doc.name,
+        'base_url': frappe.utils.get_url(),
+    })
     
-    message = f"""
-    <h3>Device Fingerprint Anomaly Detected</h3>
-    
-    <p><strong>Employee:</strong> {employee.employee_name} ({attendance_doc.employee})</p>
-    <p><strong>Date:</strong> {attendance_doc.attendance_date}</p>
-    <p><strong>Department:</strong> {attendance_doc.department or 'N/A'}</p>
-    
-    <p style="color: #d9534f;">
-    <strong>⚠️ Suspicious Activity:</strong> Multiple devices detected for this employee's check-ins.
-    This may indicate device sharing or fraudulent attendance.
-    </p>
-    
-    <p><a href="{frappe.utils.get_url()}/app/attendance/{attendance_doc.name}">View Attendance Record</a></p>
-    
-    <p style="color: #666; font-size: 12px;">
-    This is an automated alert from the Advanced Attendance System.
-    </p>
-    """
-    
-    # Send email
-    frappe.sendmail(
+    # Queue email so SMTP latency never blocks the calling request
+    frappe.enqueue(
+        'frappe.sendmail',
+        queue='short',
         recipients=recipients,
         subject=subject,
         message=message,
         reference_doctype='Attendance',
         reference_name=attendance_doc.name
     )
-    
-    frappe.log_error(f"Device anomaly alert sent for {attendance_doc.name}", "Device Anomaly Alert")
+
+    frappe.logger().info(f"Device anomaly alert queued for {attendance_doc.name}")
 
 
 def send_late_entry_alert(attendance_doc):
@@ -125,16 +122,21 @@ def send_late_entry_alert(attendance_doc):
     if not attendance_doc.late_entry:
         return
     
-    # Get employee details
-    employee = frappe.get_doc('Employee', attendance_doc.employee)
+    # Get only the employee fields the alert actually reads
+    employee = frappe.get_cached_value(
+        'Employee',
+        attendance_doc.employee,
+        ['employee_name', 'company', 'default_work_site', 'reports_to'],
+        as_dict=True
+    )
     
     # Get employee's reporting manager email
     recipients = []
     
     if employee.reports_to:
-        manager = frappe.get_doc('Employee', employee.reports_to)
-        if manager.user_id:
-            recipients.append(manager.user_id)
+        manager_user = frappe.get_cached_value('Employee', employee.reports_to, 'user_id')
+        if manager_user:
+            recipients.append(manager_user)
     
     # Also send to HR Manager
     recipients.extend(get_hr_manager_emails(employee.company))
@@ -144,27 +146,22 @@ def send_late_entry_alert(attendance_doc):
     
     # Prepare email content
     subject = f"Late Entry: {employee.employee_name} - {attendance_doc.attendance_date}"
+
+    message = frappe.render_template('templates/emails/late_entry.html', {
+        'employee': attendance_doc.employee,
+        'employee_name': employee.employee_name,
+        'attendance_date': attendance_doc.attendance_date,
+        'department': attendance_doc.department,
+        'shift': attendance_doc.shift,
+        'in_time': attendance_doc.in_time,
+        'attendance_name': attendance_doc.name,
+        'base_url': frappe.utils.get_url(),
+    })
     
-    message = f"""
-    <h3>Late Entry Notification</h3>
-    
-    <p><strong>Employee:</strong> {employee.employee_name} ({attendance_doc.employee})</p>
-    <p><strong>Date:</strong> {attendance_doc.attendance_date}</p>
-    <p><strong>Department:</strong> {attendance_doc.department or 'N/A'}</p>
-    <p><strong>Shift:</strong> {attendance_doc.shift or 'Not Set'}</p>
-    <p><strong>Check-in Time:</strong> {attendance_doc.in_time}</p>
-    
-    <p>This employee arrived late to work.</p>
-    
-    <p><a href="{frappe.utils.get_url()}/app/attendance/{attendance_doc.name}">View Attendance Record</a></p>
-    
-    <p style="color: #666; font-size: 12px;">
-    This is an automated notification from the Advanced Attendance System.
-    </p>
-    """
-    
-    # Send email
-    frappe.sendmail(
+    # Queue email so SMTP latency never blocks the calling request
+    frappe.enqueue(
+        'frappe.sendmail',
+        queue='short',
         recipients=list(set(recipients)),  # Remove duplicates
         subject=subject,
         message=message,
@@ -180,26 +177,26 @@ def send_daily_anomaly_summary():
     """
     date = today()
     
-    # Get all anomalies for the day
-    geofence_violations = frappe.db.count('Attendance', {
-        'attendance_date': date,
-        'has_outside_geofence_checkin': 1
-    })
-    
-    device_anomalies = frappe.db.count('Attendance', {
-        'attendance_date': date,
-        'device_fingerprint_anomaly': 1
-    })
-    
-    late_entries = frappe.db.count('Attendance', {
-        'attendance_date': date,
-        'late_entry': 1
-    })
-    
-    early_exits = frappe.db.count('Attendance', {
-        'attendance_date': date,
-        'early_exit': 1
-    })
+    # Get all anomalies for the day in one pass over the rows instead
+    # of four separate COUNT queries
+    counts = frappe.db.sql(
+        """
+        SELECT
+            COALESCE(SUM(has_outside_geofence_checkin), 0) AS geofence_violations,
+            COALESCE(SUM(device_fingerprint_anomaly), 0) AS device_anomalies,
+            COALESCE(SUM(late_entry), 0) AS late_entries,
+            COALESCE(SUM(early_exit), 0) AS early_exits
+        FROM `tabAttendance`
+        WHERE attendance_date = %s
+        """,
+        (date,),
+        as_dict=True
+    )[0]
+
+    geofence_violations = counts.geofence_violations
+    device_anomalies = counts.device_anomalies
+    late_entries = counts.late_entries
+    early_exits = counts.early_exits
     
     # Only send if there are anomalies
     if not any([geofence_violations, device_anomalies, late_entries, early_exits]):
@@ -213,40 +210,15 @@ def send_daily_anomaly_summary():
     
     # Prepare email content
     subject = f"Daily Attendance Anomaly Summary - {date}"
-    
-    message = f"""
-    <h3>Daily Attendance Anomaly Summary</h3>
-    <p><strong>Date:</strong> {date}</p>
-    
-    <table style="border-collapse: collapse; width: 100%; margin: 20px 0;">
-        <tr style="background-color: #f5f5f5;">
-            <th style="border: 1px solid #ddd; padding: 12px; text-align: left;">Anomaly Type</th>
-            <th style="border: 1px solid #ddd; padding: 12px; text-align: center;">Count</th>
-        </tr>
-        <tr>
-            <td style="border: 1px solid #ddd; padding: 12px;">Geofence Violations</td>
-            <td style="border: 1px solid #ddd; padding: 12px; text-align: center; color: {('#d9534f' if geofence_violations > 0 else '#5cb85c')}">{geofence_violations}</td>
-        </tr>
-        <tr>
-            <td style="border: 1px solid #ddd; padding: 12px;">Device Anomalies</td>
-            <td style="border: 1px solid #ddd; padding: 12px; text-align: center; color: {('#d9534f' if device_anomalies > 0 else '#5cb85c')}">{device_anomalies}</td>
-        </tr>
-        <tr>
-            <td style="border: 1px solid #ddd; padding: 12px;">Late Entries</td>
-            <td style="border: 1px solid #ddd; padding: 12px; text-align: center; color: {('#f0ad4e' if late_entries > 0 else '#5cb85c')}">{late_entries}</td>
-        </tr>
-        <tr>
-            <td style="border: 1px solid #ddd; padding: 12px;">Early Exits</td>
-            <td style="border: 1px solid #ddd; padding: 12px; text-align: center; color: {('#f0ad4e' if early_exits > 0 else '#5cb85c')}">{early_exits}</td>
-        </tr>
-    </table>
-    
-    <p><a href="{frappe.utils.get_url()}/app/query-report/Geofence%20Violation%20Report">View Detailed Reports</a></p>
-    
-    <p style="color: #666; font-size: 12px;">
-    This is an automated daily summary from the Advanced Attendance System.
-    </p>
-    """
+
+    message = frappe.render_template('templates/emails/daily_summary.html', {
+        'date': date,
+        'geofence_violations': geofence_violations,
+        'device_anomalies': device_anomalies,
+        'late_entries': late_entries,
+        'early_exits': early_exits,
+        'base_url': frappe.utils.get_url(),
+    })
     
     # Send email
     frappe.sendmail(
@@ -255,7 +227,7 @@ def send_daily_anomaly_summary():
         message=message
     )
     
-    frappe.log_error(f"Daily anomaly summary sent for {date}", "Daily Summary")
+    frappe.logger().info(f"Daily anomaly summary sent for {date}")
 
 
 def get_hr_manager_emails(company=None):
@@ -268,24 +240,18 @@ def get_hr_manager_emails(company=None):
     Returns:
         list: List of email addresses
     """
-    filters = {'role': 'HR Manager'}
-    
-    if company:
-        filters['company'] = company
-    
-    users = frappe.get_all(
-        'Has Role',
-        filters={'role': 'HR Manager'},
-        fields=['parent']
+    # Single JOIN query instead of one get_value per user (N+1);
+    # pluck returns the bare email column without per-row tuples/dicts
+    return frappe.db.sql(
+        """
+        SELECT DISTINCT u.email
+        FROM `tabUser` u
+        INNER JOIN `tabHas Role` r ON r.parent = u.name
+        WHERE r.role = %s AND u.enabled = 1 AND IFNULL(u.email, '') != ''
+        """,
+        ('HR Manager',),
+        pluck=True
     )
-    
-    emails = []
-    for user in users:
-        email = frappe.db.get_value('User', user.parent, 'email')
-        if email:
-            emails.append(email)
-    
-    return list(set(emails))
 
 
 def get_all_hr_manager_emails():
@@ -300,9 +266,14 @@ def test_notification(notification_type='geofence'):
     
     Args:
         notification_type: Type of notification to test
+
+    Note: not meant to be called in tight loops; it loads a real
+    Attendance record per call.
     """
-    # Get a sample attendance record
-    attendance = frappe.get_last_doc('Attendance')
+    # Get the latest attendance name with an indexed lookup, then pull
+    # the doc through the cache instead of get_last_doc's list + load
+    name = frappe.db.get_value('Attendance', {}, 'name', order_by='creation desc')
+    attendance = frappe.get_cached_doc('Attendance', name)
     
     if notification_type == 'geofence':
         attendance.has_outside_geofence_checkin = 1
@@ -12,13 +12,30 @@ from frappe.utils import get_datetime, time_diff_in_hours, flt
 from datetime import datetime, timedelta
 
 
+def _shift_hours(shift_name):
+    """
+    Expected working hours for a Shift Type
+
+    Derived from frappe.get_cached_doc, which is Redis-backed and
+    invalidated across worker processes when the Shift Type is saved —
+    no process-local memo that could go stale in long-lived workers.
+    """
+    shift = frappe.get_cached_doc('Shift Type', shift_name)
+
+    if not shift.start_time or not shift.end_time:
+        return 0.0
+
+    return (shift.end_time - shift.start_time).total_seconds() / 3600
+
+
 def calculate_overtime(attendance_doc):
     """
     Calculate overtime hours for an attendance record
     
     Args:
-        attendance_doc: Attendance document
-        
+        attendance_doc: Attendance document or dict-like row with
+            in_time, out_time and shift
+
     Returns:
         float: Overtime hours
     """
@@ -29,25 +46,20 @@ def calculate_overtime(attendance_doc):
     if not attendance_doc.shift:
         return 0.0
     
-    shift = frappe.get_doc('Shift Type', attendance_doc.shift)
+    # Cached doc: the same handful of Shift Types is shared by every
+    # attendance row in a daily batch
+    shift = frappe.get_cached_doc('Shift Type', attendance_doc.shift)
     
     if not shift.start_time or not shift.end_time:
         return 0.0
-    
-    # Convert timedelta to time
-    shift_start = (datetime.min + shift.start_time).time()
-    shift_end = (datetime.min + shift.end_time).time()
-    
+
     # Get actual work time
     in_time = get_datetime(attendance_doc.in_time)
     out_time = get_datetime(attendance_doc.out_time)
-    
-    # Calculate expected shift hours
-    shift_hours = time_diff_in_hours(
-        datetime.combine(datetime.today(), shift_end),
-        datetime.combine(datetime.today(), shift_start)
-    )
-    
+
+    # Expected shift hours come off the same cached doc as above
+    shift_hours = _shift_hours(attendance_doc.shift)
+
     # Calculate actual working hours
     actual_hours = time_diff_in_hours(out_time, in_time)
     
@@ -94,37 +106,29 @@ def calculate_break_time(employee, date):
     Returns:
         float: Total break time in hours
     """
-    # Get all check-ins for the day
-    checkins = frappe.get_all(
-        'Employee Checkin',
-        filters={
+    # Pair each OUT with the following IN via LAG() and sum the gaps
+    # database-side, instead of walking the day's punches in Python
+    break_time = frappe.db.sql(
+        """
+        SELECT COALESCE(SUM(TIMESTAMPDIFF(SECOND, prev_time, time)) / 3600, 0)
+        FROM (
+            SELECT time, log_type,
+                   LAG(time) OVER w AS prev_time,
+                   LAG(log_type) OVER w AS prev_type
+            FROM `tabEmployee Checkin`
+            WHERE employee = %(employee)s
+              AND time >= %(start)s AND time <= %(end)s
+            WINDOW w AS (ORDER BY time)
+        ) punches
+        WHERE log_type = 'IN' AND prev_type = 'OUT'
+        """,
+        {
             'employee': employee,
-            'time': ['between', [f'{date} 00:00:00', f'{date} 23:59:59']]
-        },
-        fields=['time', 'log_type'],
-        order_by='time asc'
-    )
-    
-    if len(checkins) < 2:
-        return 0.0
-    
-    break_time = 0.0
-    in_break = False
-    break_start = None
-    
-    for checkin in checkins:
-        if checkin.log_type == 'OUT' and not in_break:
-            # Start of break
-            in_break = True
-            break_start = get_datetime(checkin.time)
-        elif checkin.log_type == 'IN' and in_break:
-            # End of break
-            if break_start:
-                break_end = get_datetime(checkin.time)
-                break_time += time_diff_in_hours(break_end, break_start)
-            in_break = False
-            break_start = None
-    
+            'start': f'{date} 00:00:00',
+            'end': f'{date} 23:59:59',
+        }
+    )[0][0]
+
     return flt(break_time, 2)
 
 
@@ -135,27 +139,35 @@ def update_attendance_with_overtime(attendance_name):
     Args:
         attendance_name: Attendance document name
     """
-    attendance = frappe.get_doc('Attendance', attendance_name)
-    
+    attendance = frappe.db.get_value(
+        'Attendance',
+        attendance_name,
+        ['name', 'employee', 'attendance_date', 'in_time', 'out_time', 'shift', 'working_hours'],
+        as_dict=True
+    )
+
     # Calculate overtime
     overtime_hours = calculate_overtime(attendance)
-    
+
     # Calculate break time
     break_hours = calculate_break_time(
         attendance.employee,
         attendance.attendance_date
     )
-    
+
     # Update attendance
-    attendance.db_set('custom_overtime_hours', overtime_hours, update_modified=False)
-    attendance.db_set('custom_break_hours', break_hours, update_modified=False)
-    
+    values = {
+        'custom_overtime_hours': overtime_hours,
+        'custom_break_hours': break_hours,
+    }
+
     # Calculate net working hours (working hours - break hours)
     if attendance.working_hours:
-        net_hours = flt(attendance.working_hours) - break_hours
-        attendance.db_set('custom_net_working_hours', net_hours, update_modified=False)
-    
-    frappe.db.commit()
+        values['custom_net_working_hours'] = flt(attendance.working_hours) - break_hours
+
+    # No explicit commit; the caller (request or background worker)
+    # commits when it finishes
+    frappe.db.set_value('Attendance', attendance_name, values, update_modified=False)
 
 
 def get_overtime_summary(employee, from_date, to_date):
@@ -177,16 +189,15 @@ def get_overtime_summary(employee, from_date, to_date):
             'attendance_date': ['between', [from_date, to_date]],
             'status': 'Present'
         },
-        fields=['name', 'attendance_date', 'working_hours', 'shift']
+        fields=['name', 'attendance_date', 'working_hours', 'shift', 'in_time', 'out_time']
     )
-    
+
     total_overtime = 0.0
     total_break_time = 0.0
     overtime_days = []
-    
+
     for att in attendances:
-        attendance = frappe.get_doc('Attendance', att.name)
-        overtime = calculate_overtime(attendance)
+        overtime = calculate_overtime(att)
         break_time = calculate_break_time(employee, att.attendance_date)
         
         if overtime > 0:
@@ -227,45 +238,140 @@ def get_employee_overtime_summary(employee, from_date, to_date):
     return get_overtime_summary(employee, from_date, to_date)
 
 
+def run_overtime_update(date, names=None):
+    """
+    Compute overtime, break and net working hours for Present attendance
+    records on the given date in a single SQL UPDATE.
+
+    Break hours are derived from Employee Checkin punches by pairing each
+    OUT with the following IN via LAG(), so the whole batch is processed
+    without loading a single row into Python.
+
+    Args:
+        date: Attendance date to process
+        names: Optional list of Attendance names to restrict the update
+            to (used by the chunked background workers)
+
+    Returns:
+        int: Number of attendance rows updated
+    """
+    from frappe.utils import add_days
+
+    # overtime_threshold / overtime_multiplier are optional custom fields
+    # on Shift Type; only reference them when the columns exist
+    threshold = (
+        "COALESCE(s.overtime_threshold, 0)"
+        if frappe.db.has_column('Shift Type', 'overtime_threshold') else "0"
+    )
+    multiplier = (
+        "COALESCE(NULLIF(s.overtime_multiplier, 0), 1)"
+        if frappe.db.has_column('Shift Type', 'overtime_multiplier') else "1"
+    )
+
+    name_filter = "AND a.name IN %(names)s" if names else ""
+
+    frappe.db.sql(
+        f"""
+        UPDATE `tabAttendance` a
+        JOIN `tabShift Type` s ON s.name = a.shift
+        LEFT JOIN (
+            SELECT employee, DATE(time) AS day,
+                   SUM(CASE WHEN log_type = 'IN' AND prev_type = 'OUT'
+                            THEN TIMESTAMPDIFF(SECOND, prev_time, time)
+                            ELSE 0 END) / 3600 AS break_hours
+            FROM (
+                SELECT employee, time, log_type,
+                       LAG(time) OVER w AS prev_time,
+                       LAG(log_type) OVER w AS prev_type
+                FROM `tabEmployee Checkin`
+                WHERE time >= %(start)s AND time < %(end)s
+                WINDOW w AS (PARTITION BY employee ORDER BY time)
+            ) punches
+            GROUP BY employee, day
+        ) b ON b.employee = a.employee AND b.day = a.attendance_date
+        SET a.custom_overtime_hours = ROUND(GREATEST(0,
+                GREATEST(0,
+                    TIMESTAMPDIFF(SECOND, a.in_time, a.out_time) / 3600
+                    - TIME_TO_SEC(TIMEDIFF(s.end_time, s.start_time)) / 3600
+                ) - {threshold}
+            ) * {multiplier}, 2),
+            a.custom_break_hours = ROUND(COALESCE(b.break_hours, 0), 2),
+            a.custom_net_working_hours = ROUND(COALESCE(a.working_hours, 0) - COALESCE(b.break_hours, 0), 2)
+        WHERE a.attendance_date = %(date)s
+          AND a.status = 'Present'
+          AND a.in_time IS NOT NULL
+          AND a.out_time IS NOT NULL
+          AND s.start_time IS NOT NULL
+          AND s.end_time IS NOT NULL
+          {name_filter}
+        """,
+        {
+            'date': date,
+            'start': f'{date} 00:00:00',
+            'end': f'{add_days(date, 1)} 00:00:00',
+            'names': tuple(names or ()),
+        }
+    )
+
+    return frappe.db.sql("SELECT ROW_COUNT()")[0][0]
+
+
+# Attendance rows per background worker
+OVERTIME_CHUNK_SIZE = 500
+
+
+def _process_chunk(names, date):
+    """
+    Background worker: run the batched overtime update for one chunk of
+    attendance names. The worker commits once when the job finishes.
+    """
+    try:
+        processed = run_overtime_update(date, names=names)
+        frappe.logger().info(f"Processed overtime for {processed} attendance records.")
+    except Exception:
+        frappe.log_error(frappe.get_traceback(), "Overtime Processing Errors")
+        raise
+
+
 def process_daily_overtime():
     """
     Process overtime for all attendance records from yesterday
-    Runs as a scheduled job
+    Fans the work out to background workers in chunks; runs as a
+    scheduled job
     """
     from frappe.utils import add_days, today
-    
+
     yesterday = add_days(today(), -1)
-    
-    # Get all attendance records from yesterday
-    attendances = frappe.get_all(
+
+    names = frappe.get_all(
         'Attendance',
         filters={
             'attendance_date': yesterday,
             'status': 'Present'
         },
-        fields=['name']
+        pluck='name'
     )
-    
-    processed = 0
-    errors = []
-    
-    for att in attendances:
-        try:
-            update_attendance_with_overtime(att.name)
-            processed += 1
-        except Exception as e:
-            errors.append(f"{att.name}: {str(e)}")
-    
-    # Log results
-    frappe.log_error(
-        f"Processed overtime for {processed} attendance records. Errors: {len(errors)}",
-        "Daily Overtime Processing"
+
+    if not names:
+        return {
+            'records': 0,
+            'queued': 0
+        }
+
+    chunks = [names[i:i + OVERTIME_CHUNK_SIZE] for i in range(0, len(names), OVERTIME_CHUNK_SIZE)]
+    for chunk in chunks:
+        frappe.enqueue(
+            'advanced_attendance.overtime_calculator._process_chunk',
+            queue='long',
+            names=chunk,
+            date=yesterday
+        )
+
+    frappe.logger().info(
+        f"Queued overtime processing for {len(names)} attendance records in {len(chunks)} chunk(s)."
     )
-    
-    if errors:
-        frappe.log_error('\n'.join(errors), "Overtime Processing Errors")
-    
+
     return {
-        'processed': processed,
-        'errors': len(errors)
+        'records': len(names),
+        'queued': len(chunks)
     }
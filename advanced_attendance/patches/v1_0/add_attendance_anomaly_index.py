@@ -0,0 +1,28 @@
+import frappe
+
+# Anomaly flag custom fields covered by the index (must exist on tabAttendance)
+ANOMALY_FLAGS = [
+    'has_outside_geofence_checkin',
+    'device_fingerprint_anomaly',
+    'late_entry',
+    'early_exit',
+]
+
+
+def execute():
+    """
+    Covering index for the daily anomaly summary aggregation, so the
+    SUM-over-flags query in send_daily_anomaly_summary becomes an
+    index-only scan.
+    """
+    # The geofence/device columns are custom fields; skip the index if
+    # they have not been created on this site yet
+    for column in ANOMALY_FLAGS:
+        if not frappe.db.has_column('Attendance', column):
+            return
+
+    frappe.db.add_index(
+        'Attendance',
+        ['attendance_date'] + ANOMALY_FLAGS,
+        index_name='att_anomaly_ix'
+    )
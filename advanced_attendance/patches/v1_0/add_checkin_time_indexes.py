@@ -0,0 +1,11 @@
+import frappe
+
+
+def execute():
+    """
+    Composite (time, employee) indexes backing the attendance window
+    queries in utils.get_employees_with_punches, so the UNION halves run
+    as index range scans instead of full table scans.
+    """
+    frappe.db.add_index('Employee Checkin', ['time', 'employee'])
+    frappe.db.add_index('Mobile Checkin', ['time', 'employee'])
@@ -0,0 +1,34 @@
+import frappe
+
+
+def execute():
+    """
+    Replace the non-unique (employee, time, log_type) index with a
+    UNIQUE key so the database rejects duplicate checkins atomically;
+    the sync path then inserts with INSERT IGNORE instead of
+    prefetching existing rows. Pre-existing duplicates are removed
+    first or the unique key cannot be created.
+    """
+    # Keep the lowest-named row of each duplicate group; log_type is
+    # nullable, so compare it NULL-safe
+    frappe.db.sql(
+        """
+        DELETE e1 FROM `tabEmployee Checkin` e1
+        INNER JOIN `tabEmployee Checkin` e2
+            ON e1.employee = e2.employee
+            AND e1.time = e2.time
+            AND e1.log_type <=> e2.log_type
+            AND e1.name > e2.name
+        """
+    )
+
+    # Drop the plain index from add_sync_lookup_indexes; the unique key
+    # covers the same lookups
+    if frappe.db.sql(
+        "SHOW INDEX FROM `tabEmployee Checkin` WHERE Key_name = 'employee_time_log_type_index'"
+    ):
+        frappe.db.sql_ddl(
+            'ALTER TABLE `tabEmployee Checkin` DROP INDEX `employee_time_log_type_index`'
+        )
+
+    frappe.db.add_unique('Employee Checkin', ['employee', 'time', 'log_type'])
@@ -0,0 +1,10 @@
+import frappe
+
+
+def execute():
+    """
+    Composite (within_geofence, time) index so the daily anomaly count
+    in utils.summarize_anomalies_for_date runs as an index range scan
+    instead of a full scan of Mobile Checkin.
+    """
+    frappe.db.add_index('Mobile Checkin', ['within_geofence', 'time'])
@@ -0,0 +1,25 @@
+import frappe
+from frappe.custom.doctype.custom_field.custom_field import create_custom_fields
+
+
+def execute():
+    """
+    Counter of outstanding employee batches on the Attendance Processor
+    Log. The fan-out run inserts the log as "Partial", each batch worker
+    decrements this atomically, and the one that reaches zero finalizes
+    the status — without it the log stayed "Partial" forever.
+    """
+    if not frappe.db.exists('DocType', 'Attendance Processor Log'):
+        return
+
+    create_custom_fields({
+        'Attendance Processor Log': [
+            dict(
+                fieldname='remaining_batches',
+                fieldtype='Int',
+                label='Remaining Batches',
+                read_only=1,
+                insert_after='total',
+            )
+        ]
+    })
@@ -0,0 +1,12 @@
+import frappe
+
+
+def execute():
+    """
+    Indexes backing the device-sync lookups: the (employee, time,
+    log_type) composite turns the checkin dedup window scan into an
+    index range scan, and attendance_device_id covers the user-id to
+    employee batch resolution.
+    """
+    frappe.db.add_index('Employee Checkin', ['employee', 'time', 'log_type'])
+    frappe.db.add_index('Employee', ['attendance_device_id'])
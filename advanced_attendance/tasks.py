@@ -10,11 +10,13 @@ def sync_biometric_devices():
     Scheduled job to sync all enabled biometric devices.
     Runs every 5 minutes (configured in hooks.py).
     """
-    from advanced_attendance.zkteco_connector import sync_all_devices
-    
+    # The scheduler already runs this in a background worker, so call
+    # the job body directly instead of the enqueueing endpoint
+    from advanced_attendance.zkteco_connector import _sync_all_devices_job
+
     try:
         frappe.logger().info("Starting biometric device sync...")
-        result = sync_all_devices()
+        result = _sync_all_devices_job()
         
         if result.get('success'):
             frappe.logger().info(
@@ -58,3 +60,20 @@ def generate_daily_anomaly_snapshot():
     frappe.logger().info(f"advanced_attendance.generate_daily_anomaly_snapshot: summarizing for {target_date}")
 
     summarize_anomalies_for_date(target_date)
+
+
+def run_daily_batch():
+    """
+    Single daily entrypoint running the anomaly snapshot, overtime
+    processing and anomaly summary in sequence, so the scheduler boots
+    one job instead of three. Each step is isolated so one failure
+    doesn't abort the others.
+    """
+    from advanced_attendance.overtime_calculator import process_daily_overtime
+    from advanced_attendance.notifications import send_daily_anomaly_summary
+
+    for step in (generate_daily_anomaly_snapshot, process_daily_overtime, send_daily_anomaly_summary):
+        try:
+            step()
+        except Exception:
+            frappe.log_error(frappe.get_traceback(), f"Daily batch step failed: {step.__name__}")
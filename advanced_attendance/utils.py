@@ -1,18 +1,25 @@
 import frappe
+import hashlib
 import math
 import json
+import numpy as np
 from datetime import datetime, timedelta
+from itertools import groupby
+from frappe.model.naming import make_autoname
 from frappe.utils import getdate, now_datetime
 
 # -----------------------------
 # Work Site & Geofence Helpers
 # -----------------------------
 
-def get_effective_work_site(employee: str) -> str | None:
+def get_effective_work_site(employee: str, default_work_site: str | None = None) -> str | None:
     """
     Resolve effective Work Site for an employee:
     1) Active Tour Plan for today
     2) Employee.default_work_site
+
+    Callers that already hold the employee's default_work_site can pass
+    it in to skip the extra Employee lookup.
     """
     today = getdate()
 
@@ -29,51 +36,126 @@ def get_effective_work_site(employee: str) -> str | None:
     if tour_plan:
         return tour_plan
 
-    default_work_site = frappe.db.get_value("Employee", employee, "default_work_site")
-    return default_work_site
+    if default_work_site:
+        return default_work_site
+
+    return frappe.get_cached_value("Employee", employee, "default_work_site")
 
 
-def compute_geofence_flag(work_site_name: str | None, lat: float, lng: float) -> bool:
+def compute_geofence_flag(work_site_name: str | None, lat, lng):
     """
     Return True if (lat, lng) is within the Work Site radius, False otherwise.
     If no Work Site is configured, return False (or decide your own business rule).
+
+    lat/lng may also be array-likes; all points are then scored against
+    the site in one vectorized pass and a boolean mask is returned.
     """
+    batch = isinstance(lat, (list, tuple, np.ndarray))
+
     if not work_site_name:
-        return False
+        return np.zeros(len(lat), dtype=bool) if batch else False
 
-    ws = frappe.db.get_value(
+    # Work Sites are a tiny, rarely-changing table; the cached value
+    # saves one DB round-trip per punch during bulk ingestion
+    ws = frappe.get_cached_value(
         "Work Site",
         work_site_name,
         ["latitude", "longitude", "radius"],
         as_dict=True
     )
     if not ws or not ws.latitude or not ws.longitude or not ws.radius:
+        return np.zeros(len(lat), dtype=bool) if batch else False
+
+    site_lat = float(ws.latitude)
+    site_lon = float(ws.longitude)
+    radius = float(ws.radius)
+
+    if batch:
+        lat_arr = np.asarray(lat, dtype=float)
+        lng_arr = np.asarray(lng, dtype=float)
+        # Same bounding-box reject as the scalar path below, vectorized:
+        # only points surviving the cheap prune pay for the trig kernel
+        candidates = (
+            (np.abs(lat_arr - site_lat) * 111320.0 <= radius)
+            & (np.abs(lng_arr - site_lon) * (111320.0 * math.cos(site_lat * _DEG2RAD)) <= radius)
+        )
+        within = np.zeros(lat_arr.shape, dtype=bool)
+        if candidates.any():
+            distances = haversine_distance_meters_vec(
+                site_lat, site_lon, lat_arr[candidates], lng_arr[candidates]
+            )
+            within[candidates] = distances <= radius
+        return within
+
+    # Cheap equirectangular bounding-box reject before the trig-heavy
+    # haversine (one degree of latitude is ~111320 m)
+    if abs(lat - site_lat) * 111320.0 > radius:
         return False
+    if abs(lng - site_lon) * 111320.0 * math.cos(math.radians(site_lat)) > radius:
+        return False
+
+    distance_m = haversine_distance_meters(site_lat, site_lon, lat, lng)
+    return distance_m <= radius
 
-    distance_m = haversine_distance_meters(float(ws.latitude), float(ws.longitude), lat, lng)
-    return distance_m <= float(ws.radius)
 
+# Degrees-to-radians multiplier, hoisted out of the haversine hot path
+_DEG2RAD = math.pi / 180.0
 
-def haversine_distance_meters(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+
+def haversine_distance_meters(
+    lat1: float, lon1: float, lat2: float, lon2: float,
+    # Bound as defaults so the hot path uses fast local lookups instead
+    # of module attribute lookups per call
+    _sin=math.sin, _cos=math.cos, _asin=math.asin, _sqrt=math.sqrt,
+) -> float:
     """
     Calculate distance (in meters) between two GPS coordinates.
+
+    Uses the equivalent 2*asin(sqrt(a)) form of the haversine, which
+    needs one sqrt and an asin instead of two sqrts and an atan2.
+    12742000 is the Earth diameter (2R) in meters.
+    """
+    phi1 = lat1 * _DEG2RAD
+    phi2 = lat2 * _DEG2RAD
+    s1 = _sin((lat2 - lat1) * _DEG2RAD * 0.5)
+    s2 = _sin((lon2 - lon1) * _DEG2RAD * 0.5)
+
+    a = s1 * s1 + _cos(phi1) * _cos(phi2) * s2 * s2
+
+    return 12742000.0 * _asin(_sqrt(a))
+
+
+def haversine_distance_meters_vec(lat1: float, lon1: float, lats, lons):
+    """
+    Vectorized haversine: distances (in meters) from one reference point
+    to many points at once.
+
+    lats, lons: array-likes of coordinates. Returns an np.ndarray of
+    distances, one per (lat, lon) pair. Use this instead of calling
+    haversine_distance_meters in a Python loop when scoring a batch of
+    punches or candidate sites.
     """
     R = 6371000  # Earth radius in meters
     phi1 = math.radians(lat1)
-    phi2 = math.radians(lat2)
-    dphi = math.radians(lat2 - lat1)
-    dlambda = math.radians(lon2 - lon1)
+    phi2 = np.radians(np.asarray(lats, dtype=float))
+    dphi = phi2 - phi1
+    dlambda = np.radians(np.asarray(lons, dtype=float) - lon1)
 
-    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
-    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+    a = np.sin(dphi / 2) ** 2 + math.cos(phi1) * np.cos(phi2) * np.sin(dlambda / 2) ** 2
 
-    return R * c
+    return 2 * R * np.arcsin(np.sqrt(a))
 
 
 # -----------------------------
 # Device Fingerprint
 # -----------------------------
 
+# Reused encoder instance: json.dumps builds a fresh JSONEncoder per
+# call, which dominates serialization cost on small payloads
+_JSON_ENCODE = json.JSONEncoder(sort_keys=True, separators=(",", ":")).encode
+_EMPTY_FINGERPRINT = b"{}"
+
+
 def hash_fingerprint(fingerprint_raw, request) -> str:
     """
     Produce a stable string hash for device fingerprint.
@@ -89,26 +171,40 @@ def hash_fingerprint(fingerprint_raw, request) -> str:
         ua = ""
 
     ip = getattr(frappe.local, "request_ip", "") or ""
-    data = {
-        "ua": ua,
-        "ip": ip,
-        "raw": fingerprint_raw or {},
-    }
-    serialized = json.dumps(data, sort_keys=True)
-    # Simple hash using sha1 for stability (not security-critical)
-    import hashlib
-    return hashlib.sha1(serialized.encode("utf-8")).hexdigest()
+
+    # BLAKE2b is ~3x faster than SHA-1 in CPython and this hash is not
+    # security-critical; feed the components as chunks so only the raw
+    # fingerprint needs JSON serialization
+    h = hashlib.blake2b(digest_size=20)
+    h.update(ua.encode("utf-8"))
+    h.update(b"|")
+    h.update(ip.encode("utf-8"))
+    h.update(b"|")
+    if fingerprint_raw:
+        h.update(_JSON_ENCODE(fingerprint_raw).encode("utf-8"))
+    else:
+        h.update(_EMPTY_FINGERPRINT)
+    return h.hexdigest()
 
 
 # -----------------------------
 # Attendance Processing Engine
 # -----------------------------
 
+# Employees per long-queue batch job; large enough to amortize worker
+# boot and Employee prefetch, small enough to fan out across RQ workers
+EMPLOYEE_BATCH_SIZE = 200
+
+
 def process_attendance_window(from_date, to_date):
     """
     Process attendance for all employees between from_date and to_date.
 
     from_date, to_date: date objects or strings (YYYY-MM-DD).
+
+    Employee batches are fanned out to the long queue so a large window
+    never runs into a single worker's wall-clock ceiling; each batch
+    folds its counts into the shared Attendance Processor Log.
     """
     from_date = getdate(from_date)
     to_date = getdate(to_date)
@@ -124,35 +220,141 @@ def process_attendance_window(from_date, to_date):
     })
     log.insert(ignore_permissions=True)
 
-    total_processed = 0
-    errors = []
-
     try:
         # Get all employees that have punches in the window
         employees = get_employees_with_punches(from_date, to_date)
 
-        for emp in employees:
-            try:
-                for day in daterange(from_date, to_date):
-                    processed = process_employee_day(emp, day, log.name)
-                    total_processed += processed
-            except Exception as e:
-                frappe.log_error(
-                    message=frappe.get_traceback(),
-                    title=f"Attendance processing error for employee {emp}"
-                )
-                errors.append(f"{emp}: {str(e)}")
-
-        log.status = "Success" if not errors else "Partial"
-    except Exception as e:
+        if not employees:
+            log.status = "Success"
+            log.save(ignore_permissions=True)
+            frappe.db.commit()
+            return
+
+        batches = [
+            employees[i:i + EMPLOYEE_BATCH_SIZE]
+            for i in range(0, len(employees), EMPLOYEE_BATCH_SIZE)
+        ]
+
+        # The last batch worker to finish flips the status off
+        # "Partial", so record how many are outstanding up front
+        if frappe.db.has_column("Attendance Processor Log", "remaining_batches"):
+            frappe.db.set_value(
+                "Attendance Processor Log", log.name,
+                "remaining_batches", len(batches), update_modified=False
+            )
+
+        for batch in batches:
+            frappe.enqueue(
+                "advanced_attendance.utils._process_batch",
+                queue="long",
+                timeout=3600,
+                employees=batch,
+                from_date=from_date,
+                to_date=to_date,
+                log_name=log.name,
+            )
+        frappe.db.commit()
+    except Exception:
         log.status = "Failed"
-        errors.append(str(e))
-        frappe.log_error(frappe.get_traceback(), "Attendance processing window failed")
-    finally:
-        log.total = total_processed
-        log.errors = "\n".join(errors)
         log.save(ignore_permissions=True)
         frappe.db.commit()
+        frappe.log_error(frappe.get_traceback(), "Attendance processing window failed")
+
+
+def _process_batch(employees, from_date, to_date, log_name):
+    """
+    Long-queue worker for one employee batch.
+
+    Folds results into the shared Attendance Processor Log with atomic
+    increments so concurrent batches never lose each other's updates.
+    """
+    processed, errors = _process_emp_chunk(employees, from_date, to_date, log_name)
+
+    frappe.db.sql(
+        "UPDATE `tabAttendance Processor Log` SET total = total + %s WHERE name = %s",
+        (processed, log_name)
+    )
+    if errors:
+        frappe.db.sql(
+            """
+            UPDATE `tabAttendance Processor Log`
+            SET errors = TRIM(LEADING '\n' FROM CONCAT(IFNULL(errors, ''), '\n', %s))
+            WHERE name = %s
+            """,
+            ("\n".join(errors), log_name)
+        )
+
+    # Decrement the outstanding-batch counter; the worker that reaches
+    # zero finalizes the status. LAST_INSERT_ID exposes the decremented
+    # value on this connection, so there is no race between the UPDATE
+    # and a separate read.
+    if frappe.db.has_column("Attendance Processor Log", "remaining_batches"):
+        frappe.db.sql(
+            """
+            UPDATE `tabAttendance Processor Log`
+            SET remaining_batches = LAST_INSERT_ID(remaining_batches - 1)
+            WHERE name = %s
+            """,
+            (log_name,)
+        )
+        if frappe.db.sql("SELECT LAST_INSERT_ID()")[0][0] == 0:
+            # All batches are in; Partial keeps its original meaning of
+            # "completed with errors"
+            frappe.db.sql(
+                """
+                UPDATE `tabAttendance Processor Log`
+                SET status = IF(IFNULL(errors, '') = '', 'Success', 'Partial')
+                WHERE name = %s
+                """,
+                (log_name,)
+            )
+    frappe.db.commit()
+
+
+def _process_emp_chunk(employees, from_date, to_date, log_name):
+    """
+    Process a chunk of employees over the window; the independent unit
+    of work for parallel runs. Returns (processed_count, error_list).
+    """
+    errors = []
+
+    # Batch-fetch per-employee defaults once for the whole chunk
+    # instead of one Employee lookup per employee-day
+    emp_map = {}
+    if employees:
+        for row in frappe.get_all(
+            "Employee",
+            filters={"name": ["in", employees]},
+            fields=["name", "default_shift_type", "default_work_site"]
+        ):
+            emp_map[row.name] = row
+
+    # Warm the cache for every shift type in the chunk so the inner
+    # loop only ever hits the cache
+    for shift_type in {e.default_shift_type for e in emp_map.values() if e.default_shift_type}:
+        frappe.get_cached_value("Shift Type", shift_type, ["start_time", "end_time"])
+
+    # Day bounds are identical for every employee in the chunk; compute
+    # them once instead of two getdate parses + combines per employee
+    start_dt = datetime.combine(getdate(from_date), datetime.min.time())
+    end_dt = datetime.combine(getdate(to_date), datetime.max.time())
+
+    planned_rows = []
+    for emp in employees:
+        try:
+            planned_rows.extend(process_employee_window(
+                emp, start_dt, end_dt, log_name, emp_map
+            ))
+        except Exception as e:
+            frappe.log_error(
+                message=frappe.get_traceback(),
+                title=f"Attendance processing error for employee {emp}"
+            )
+            errors.append(f"{emp}: {str(e)}")
+
+    total_processed = _flush_attendance_rows(planned_rows)
+
+    return total_processed, errors
 
 
 def get_employees_with_punches(from_date, to_date):
@@ -160,110 +362,243 @@ def get_employees_with_punches(from_date, to_date):
     Return list of employee IDs that have punches between dates in either
     Employee Checkin or Mobile Checkin.
     """
-    emp1 = frappe.db.sql_list(
-        """
-        SELECT DISTINCT employee
-        FROM `tabEmployee Checkin`
-        WHERE time BETWEEN %s AND %s
-        """,
-        (from_date, add_one_day(to_date))
-    )
-    emp2 = frappe.db.sql_list(
+    # One UNION round-trip (UNION already dedupes) instead of two
+    # queries merged via set() in Python; the (time, employee) indexes
+    # let both halves run as index-only scans
+    return frappe.db.sql_list(
         """
-        SELECT DISTINCT employee
-        FROM `tabMobile Checkin`
-        WHERE time BETWEEN %s AND %s
+        SELECT employee FROM `tabEmployee Checkin`
+        WHERE time BETWEEN %(from)s AND %(to)s
+        UNION
+        SELECT employee FROM `tabMobile Checkin`
+        WHERE time BETWEEN %(from)s AND %(to)s
         """,
-        (from_date, add_one_day(to_date))
+        {"from": from_date, "to": add_one_day(to_date)}
     )
-    return list(set(emp1 + emp2))
 
 
 def add_one_day(d):
     return getdate(d) + timedelta(days=1)
 
 
-def daterange(start_date, end_date):
-    for n in range(int((end_date - start_date).days) + 1):
-        yield start_date + timedelta(n)
+def process_employee_window(employee, start_dt, end_dt, processor_log_name, emp_map=None) -> list:
+    """
+    Process attendance for a single employee across the whole window.
+    Returns the planned Attendance rows for _flush_attendance_rows.
 
+    start_dt, end_dt: precomputed datetime bounds of the window (the
+    caller computes them once for all employees).
 
-def process_employee_day(employee, date, processor_log_name) -> int:
-    """
-    Process attendance for a single employee on a single date.
-    Returns number of Attendance docs created/updated (0 or 1).
+    Fetches every punch in the window with one query and groups them by
+    date in Python, instead of one round-trip per employee-day.
+
+    emp_map: optional {employee: row} dict with default_shift_type /
+    default_work_site prefetched by process_attendance_window.
     """
-    # Get punches for that date
-    start_dt = datetime.combine(getdate(date), datetime.min.time())
-    end_dt = datetime.combine(getdate(date), datetime.max.time())
+    # Get shift type (simple assumption: use default_shift_type on Employee)
+    emp_defaults = (emp_map or {}).get(employee)
+    if emp_defaults is None:
+        emp_defaults = frappe.db.get_value(
+            "Employee", employee, ["name", "default_shift_type", "default_work_site"], as_dict=True
+        ) or frappe._dict()
 
-    punches = []
+    shift_type = emp_defaults.get("default_shift_type")
+    if not shift_type:
+        # Optionally skip employee if no shift_type assigned
+        return []
 
-    # Employee Checkin (biometric / manual)
-    for row in frappe.db.get_all(
-        "Employee Checkin",
-        filters={
-            "employee": employee,
-            "time": ["between", [start_dt, end_dt]],
-            "aa_processed": ["!=", 1]  # custom field (Check) you must add via Customize Form
-        },
-        fields=["name", "time", "log_type as direction"]
-    ):
-        punches.append({
-            "source": "Employee Checkin",
-            "name": row.name,
-            "time": row.time,
-            "direction": row.direction,
-            "within_geofence": None,
-            "device_fingerprint": None,
-        })
+    # Cached, and only the two fields the day logic reads — hydrating
+    # the full Shift Type doc per employee is wasted work
+    shift = frappe.get_cached_value(
+        "Shift Type", shift_type, ["start_time", "end_time"], as_dict=True
+    )
 
-    # Mobile Checkin
-    for row in frappe.db.get_all(
-        "Mobile Checkin",
-        filters={
-            "employee": employee,
-            "time": ["between", [start_dt, end_dt]],
-            "processed": ["!=", 1]
-        },
-        fields=["name", "time", "direction", "within_geofence", "device_fingerprint"]
-    ):
-        punches.append({
-            "source": "Mobile Checkin",
-            "name": row.name,
-            "time": row.time,
-            "direction": row.direction,
-            "within_geofence": row.within_geofence,
-            "device_fingerprint": row.device_fingerprint,
-        })
+    # Both punch sources in one UNION ALL round-trip covering the whole
+    # window, already sorted by the database (aa_processed is a custom
+    # Check field you must add to Employee Checkin via Customize Form)
+    punches = frappe.db.sql(
+        """
+        SELECT 'Employee Checkin' AS source, name, time, log_type AS direction,
+               NULL AS within_geofence, NULL AS device_fingerprint
+        FROM `tabEmployee Checkin`
+        WHERE employee = %(employee)s
+          AND time BETWEEN %(start)s AND %(end)s
+          AND IFNULL(aa_processed, 0) != 1
+        UNION ALL
+        SELECT 'Mobile Checkin', name, time, direction,
+               within_geofence, device_fingerprint
+        FROM `tabMobile Checkin`
+        WHERE employee = %(employee)s
+          AND time BETWEEN %(start)s AND %(end)s
+          AND IFNULL(processed, 0) != 1
+        ORDER BY time
+        """,
+        {"employee": employee, "start": start_dt, "end": end_dt},
+        as_dict=True
+    )
+
+    rows = []
+    # Rows arrive time-ordered, so groupby yields each day exactly once
+    for day, day_punches in groupby(punches, key=lambda p: p["time"].date()):
+        row = _process_day_punches(
+            employee, day, list(day_punches), shift, processor_log_name
+        )
+        if row:
+            rows.append(row)
+    return rows
 
-    if not punches:
-        return 0
 
-    # Sort by time
-    punches.sort(key=lambda x: x["time"])
+def _process_day_punches(employee, date, punches, shift, processor_log_name):
+    """
+    Plan one employee-day's Attendance row from its punches.
+
+    shift: dict with the Shift Type's start_time / end_time.
 
+    Returns a column dict for _flush_attendance_rows, or None when the
+    punches yield nothing actionable. Punches are marked processed here
+    either way.
+    """
     # De-duplicate: drop subsequent punches within X seconds with same direction
     deduped = deduplicate_punches(punches, threshold_seconds=60)
 
-    # Get shift type (simple assumption: use default_shift_type on Employee)
-    shift_type = frappe.db.get_value("Employee", employee, "default_shift_type")
-    if not shift_type:
-        # Optionally skip employee if no shift_type assigned
-        return 0
-
-    shift_doc = frappe.get_doc("Shift Type", shift_type)
-    in_time, out_time = classify_in_out(deduped, shift_doc)
+    in_time, out_time = classify_in_out(deduped, shift.start_time, shift.end_time)
 
     if not in_time and not out_time:
         # Nothing meaningful to create attendance
         mark_punches_processed(deduped, processor_log_name)
+        return None
+
+    row = {
+        "employee": employee,
+        "attendance_date": date,
+        # Basic status logic (can be extended)
+        "status": "Present",
+        "late_entry": 0,
+        "early_exit": 0,
+        # Custom Check field on Attendance (create via Customize Form)
+        "has_outside_geofence_checkin": 0,
+    }
+
+    # Late / early (very simplified example)
+    # Convert timedelta to time for comparison
+    if in_time and shift.start_time:
+        shift_start = (datetime.min + shift.start_time).time()
+        if in_time.time() > shift_start:
+            row["late_entry"] = 1
+    if out_time and shift.end_time:
+        shift_end = (datetime.min + shift.end_time).time()
+        if out_time.time() < shift_end:
+            row["early_exit"] = 1
+
+    if any(p["source"] == "Mobile Checkin" and p["within_geofence"] == 0 for p in deduped):
+        row["has_outside_geofence_checkin"] = 1
+
+    # Mark punches processed
+    mark_punches_processed(deduped, processor_log_name)
+
+    return row
+
+
+# Attendance is named from this series (HRMS default); bulk inserts have
+# to mint names themselves since they bypass per-doc autoname
+ATTENDANCE_NAMING_SERIES = "HR-ATT-.YYYY.-"
+
+
+def _flush_attendance_rows(rows) -> int:
+    """
+    Write planned Attendance rows in bulk: one bulk_insert for new rows
+    and one CASE-per-column UPDATE for existing ones, instead of a full
+    doc save per employee-day.
+
+    This deliberately skips per-doc validation and hooks; set
+    frappe.flags.attendance_save_docs to route rows through att.save()
+    where hook side effects are required.
+    """
+    if not rows:
         return 0
 
-    # Create or update Attendance
+    if frappe.flags.attendance_save_docs:
+        for row in rows:
+            _save_attendance_doc(row)
+        return len(rows)
+
+    employees = list({r["employee"] for r in rows})
+    dates = [r["attendance_date"] for r in rows]
+
+    # One lookup for every (employee, date) pair in the flush instead of
+    # a get_value per row
+    existing = {
+        (ex.employee, getdate(ex.attendance_date)): ex.name
+        for ex in frappe.get_all(
+            "Attendance",
+            filters={
+                "employee": ["in", employees],
+                "attendance_date": ["between", [min(dates), max(dates)]],
+            },
+            fields=["name", "employee", "attendance_date"],
+        )
+    }
+
+    cols = ["status", "late_entry", "early_exit"]
+    if frappe.db.has_column("Attendance", "has_outside_geofence_checkin"):
+        cols.append("has_outside_geofence_checkin")
+
+    inserts = []
+    updates = []
+    for row in rows:
+        name = existing.get((row["employee"], getdate(row["attendance_date"])))
+        if name:
+            updates.append((name, row))
+        else:
+            inserts.append(row)
+
+    if inserts:
+        now = now_datetime()
+        user = frappe.session.user
+        fields = [
+            "name", "naming_series", "owner", "creation", "modified",
+            "modified_by", "docstatus", "employee", "attendance_date",
+        ] + cols
+        values = [
+            tuple(
+                [
+                    make_autoname(ATTENDANCE_NAMING_SERIES + ".#####"),
+                    ATTENDANCE_NAMING_SERIES,
+                    user, now, now, user, 0,
+                    row["employee"], row["attendance_date"],
+                ]
+                + [row.get(col, 0) for col in cols]
+            )
+            for row in inserts
+        ]
+        frappe.db.bulk_insert("Attendance", fields, values)
+
+    if updates:
+        when_sql = " ".join(["WHEN %s THEN %s"] * len(updates))
+        set_clauses = [f"`{col}` = CASE name {when_sql} END" for col in cols]
+        args = []
+        for col in cols:
+            for name, row in updates:
+                args.extend([name, row.get(col, 0)])
+        args.append(frappe.session.user)
+        args.append(tuple(name for name, _ in updates))
+        frappe.db.sql(
+            """
+            UPDATE `tabAttendance`
+            SET {set_clauses}, modified = NOW(), modified_by = %s
+            WHERE name IN %s
+            """.format(set_clauses=", ".join(set_clauses)),
+            args
+        )
+
+    return len(rows)
+
+
+def _save_attendance_doc(row):
+    """Hook-preserving fallback: write one planned row through the ORM."""
     att_name = frappe.db.get_value("Attendance", {
-        "employee": employee,
-        "attendance_date": date
+        "employee": row["employee"],
+        "attendance_date": row["attendance_date"],
     }, "name")
 
     if att_name:
@@ -271,44 +606,19 @@ def process_employee_day(employee, date, processor_log_name) -> int:
     else:
         att = frappe.get_doc({
             "doctype": "Attendance",
-            "employee": employee,
-            "attendance_date": date,
+            "employee": row["employee"],
+            "attendance_date": row["attendance_date"],
         })
 
-    # Basic status logic (can be extended)
-    att.status = "Present"
-
-    # Late / early (very simplified example)
-    # Convert timedelta to time for comparison
-    if in_time and hasattr(shift_doc, "start_time") and shift_doc.start_time:
-        shift_start = (datetime.min + shift_doc.start_time).time()
-        if in_time.time() > shift_start:
-            att.late_entry = 1
-    if out_time and hasattr(shift_doc, "end_time") and shift_doc.end_time:
-        shift_end = (datetime.min + shift_doc.end_time).time()
-        if out_time.time() < shift_end:
-            att.early_exit = 1
-
-    # Custom fields on Attendance to store flags (create via Customize Form)
-    # Example custom fields:
-    # - has_outside_geofence_checkin (Check)
-    # - device_fingerprint_anomaly (Check)
-
-    has_outside_geofence = any(
-        p["source"] == "Mobile Checkin" and p["within_geofence"] == 0 for p in deduped
-    )
+    att.status = row["status"]
+    att.late_entry = row["late_entry"]
+    att.early_exit = row["early_exit"]
     if hasattr(att, "has_outside_geofence_checkin"):
-        att.has_outside_geofence_checkin = 1 if has_outside_geofence else 0
+        att.has_outside_geofence_checkin = row["has_outside_geofence_checkin"]
 
-    # Save Attendance
     att.flags.ignore_permissions = True
     att.save()
 
-    # Mark punches processed
-    mark_punches_processed(deduped, processor_log_name)
-
-    return 1
-
 
 def deduplicate_punches(punches, threshold_seconds=60):
     """
@@ -317,6 +627,10 @@ def deduplicate_punches(punches, threshold_seconds=60):
     if not punches:
         return []
 
+    # Each punch is compared to the last *kept* one, so a chain of
+    # same-direction punches spaced under the threshold collapses to
+    # its first member. This only ever sees one employee-day's punches
+    # (a handful of rows), so a plain loop is the right tool.
     deduped = [punches[0]]
     for p in punches[1:]:
         last = deduped[-1]
@@ -330,40 +644,51 @@ def deduplicate_punches(punches, threshold_seconds=60):
     return deduped
 
 
-def classify_in_out(punches, shift_doc):
+# Direction variants per side; sets so membership stays O(1) as more
+# device-specific spellings get added
+IN_DIRECTIONS = {"IN", "IN PUNCH"}
+OUT_DIRECTIONS = {"OUT", "OUT PUNCH"}
+
+
+def classify_in_out(punches, shift_start=None, shift_end=None):
     """
     Simplified classification: first IN as in_time, last OUT as out_time.
-    You can refine this with shift windows if needed.
+    You can refine this with the shift_start/shift_end windows if needed.
     """
-    in_time = None
-    out_time = None
+    # Partition once, then let C-level min/max do the reduction instead
+    # of per-punch Python comparisons
+    ins = [p["time"] for p in punches if p["direction"] in IN_DIRECTIONS]
+    outs = [p["time"] for p in punches if p["direction"] in OUT_DIRECTIONS]
 
-    for p in punches:
-        if p["direction"] in ("IN", "IN PUNCH"):
-            if not in_time or p["time"] < in_time:
-                in_time = p["time"]
-        elif p["direction"] in ("OUT", "OUT PUNCH"):
-            if not out_time or p["time"] > out_time:
-                out_time = p["time"]
-
-    return in_time, out_time
+    return (min(ins) if ins else None, max(outs) if outs else None)
 
 
 def mark_punches_processed(punches, processor_log_name):
     """
     Set processed flags on Mobile Checkin and aa_processed on Employee Checkin.
+
+    One bulk UPDATE per source instead of a set_value (plus autocommit)
+    per punch; committing is left to process_attendance_window's
+    end-of-run commit.
     """
-    for p in punches:
-        if p["source"] == "Mobile Checkin":
-            frappe.db.set_value("Mobile Checkin", p["name"], {
-                "processed": 1,
-                "processing_batch": processor_log_name
-            })
-        elif p["source"] == "Employee Checkin":
-            frappe.db.set_value("Employee Checkin", p["name"], {
-                "aa_processed": 1
-            })
-    frappe.db.commit()
+    mobile_names = [p["name"] for p in punches if p["source"] == "Mobile Checkin"]
+    checkin_names = [p["name"] for p in punches if p["source"] == "Employee Checkin"]
+
+    if mobile_names:
+        frappe.db.sql(
+            """
+            UPDATE `tabMobile Checkin`
+            SET processed = 1, processing_batch = %s
+            WHERE name IN %s
+            """,
+            (processor_log_name, tuple(mobile_names))
+        )
+
+    if checkin_names:
+        frappe.db.sql(
+            "UPDATE `tabEmployee Checkin` SET aa_processed = 1 WHERE name IN %s",
+            (tuple(checkin_names),)
+        )
 
 
 # -----------------------------
@@ -379,13 +704,15 @@ def summarize_anomalies_for_date(target_date):
     start_dt = datetime.combine(getdate(target_date), datetime.min.time())
     end_dt = datetime.combine(getdate(target_date), datetime.max.time())
 
-    count_outside = frappe.db.count(
-        "Mobile Checkin",
-        filters={
-            "time": ["between", [start_dt, end_dt]],
-            "within_geofence": 0
-        }
-    )
+    # Direct COUNT(*) over the (within_geofence, time) composite index
+    # added in v1_0.add_mobile_checkin_geofence_index
+    count_outside = frappe.db.sql(
+        """
+        SELECT COUNT(*) FROM `tabMobile Checkin`
+        WHERE within_geofence = 0 AND time BETWEEN %s AND %s
+        """,
+        (start_dt, end_dt)
+    )[0][0]
 
     frappe.logger().info(
         f"advanced_attendance.summarize_anomalies_for_date: {target_date} outside_geofence={count_outside}"
@@ -8,10 +8,204 @@ Supports multiple ZKTeco models including MB160 Plus
 """
 
 import frappe
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from frappe import _
 from frappe.utils import now_datetime, get_datetime
+from frappe.utils.caching import redis_cache
 from zk import ZK, const
 
+# Employee Checkin is named from this series (HRMS default); bulk
+# inserts mint names themselves since they bypass per-doc autoname
+CHECKIN_NAMING_SERIES = 'EMP-CKIN-.MM.-.YYYY.-'
+
+CHECKIN_INSERT_FIELDS = [
+    'name', 'naming_series', 'owner', 'creation', 'modified',
+    'modified_by', 'employee', 'time', 'log_type', 'device_id',
+]
+
+# Rows per bulk INSERT during device sync
+CHECKIN_INSERT_CHUNK = 1000
+
+# Device status → checkin log type
+# Status: 0=Check-In, 1=Check-Out, 2=Break-Out, 3=Break-In, 4=OT-In, 5=OT-Out
+STATUS_TO_LOG_TYPE = {0: 'IN', 3: 'IN', 4: 'IN', 1: 'OUT', 2: 'OUT', 5: 'OUT'}
+
+def _log_fail(msg, title, severe=False):
+    """
+    Single-sink error reporting: severe failures go to the Error Log
+    DocType (a DB insert), routine ones only to the site log file, so a
+    device that is simply offline does not double-write on every
+    scheduled tick.
+    """
+    if severe:
+        frappe.log_error(msg, title)
+    else:
+        frappe.logger().error(f"{title}: {msg}")
+
+
+# Live device connections keyed by (ip, port). Scheduled syncs hit the
+# same devices every few minutes, so reusing a still-fresh connection
+# skips the per-call handshake.
+_CONN_POOL = {}
+_CONN_POOL_TTL = 60  # seconds
+
+
+def _evict_stale_connections():
+    """Close pooled connections past their TTL"""
+    now = time.time()
+    for key, (conn, ts) in list(_CONN_POOL.items()):
+        if now - ts >= _CONN_POOL_TTL:
+            _CONN_POOL.pop(key, None)
+            try:
+                conn.disconnect()
+            except Exception:
+                pass
+
+
+def _reserve_checkin_names(count):
+    """
+    Reserve `count` sequential names from the Employee Checkin series
+    with a single tabSeries round-trip instead of one make_autoname
+    call (SELECT + UPDATE) per row.
+    """
+    now = now_datetime()
+    prefix = 'EMP-CKIN-{:02d}-{}-'.format(now.month, now.year)
+
+    frappe.db.sql(
+        """
+        INSERT INTO `tabSeries` (name, current) VALUES (%s, %s)
+        ON DUPLICATE KEY UPDATE current = current + %s
+        """,
+        (prefix, count, count)
+    )
+    current = frappe.db.sql(
+        'SELECT current FROM `tabSeries` WHERE name = %s', (prefix,)
+    )[0][0]
+
+    # 5-digit padding matches make_autoname's default, so bulk-minted
+    # names sort with doc-inserted ones on the same series
+    return [f'{prefix}{n:05d}' for n in range(current - count + 1, current + 1)]
+
+
+def _flush_checkins(pending):
+    """
+    Bulk-insert accumulated checkin rows: one series reservation and one
+    multi-row INSERT IGNORE instead of a full doc.insert per record. The
+    UNIQUE key on (employee, time, log_type) makes the database drop
+    duplicates atomically, so no pre-check is needed.
+
+    pending: list of (employee, time, log_type, device_id) tuples.
+
+    Returns:
+        int: number of rows actually inserted.
+    """
+    if not pending:
+        return 0
+
+    names = _reserve_checkin_names(len(pending))
+    now = now_datetime()
+    user = frappe.session.user
+    values = [
+        (name, CHECKIN_NAMING_SERIES, user, now, now, user) + row
+        for name, row in zip(names, pending)
+    ]
+    frappe.db.bulk_insert(
+        'Employee Checkin', CHECKIN_INSERT_FIELDS, values, ignore_duplicates=True
+    )
+
+    return frappe.db.sql("SELECT ROW_COUNT()")[0][0]
+
+
+def _sync_log_chunk(logs, device_ip):
+    """
+    Process one streamed chunk of device logs: batch-resolve employees,
+    then bulk-insert with INSERT IGNORE — the unique key on
+    (employee, time, log_type) filters rows already synced, with no
+    race window between check and insert.
+
+    Device user ids of rejected inactive employees are returned instead
+    of deleted here, so the caller can batch the device mutations after
+    the sync instead of interleaving UDP round-trips with DB inserts.
+
+    Returns:
+        tuple: (synced_count, errors, inactive_uids)
+    """
+    # Devices repeat (user_id, timestamp, status) tuples across polls;
+    # drop them before any DB work, and sort by timestamp so inserts
+    # land in B-tree order
+    seen = set()
+    deduped = []
+    for log in logs:
+        key = (log['user_id'], log['timestamp'], log['status'])
+        if key not in seen:
+            seen.add(key)
+            deduped.append(log)
+    deduped.sort(key=lambda l: l['timestamp'])
+    logs = deduped
+
+    # One IN query maps every device user_id in the chunk to its
+    # employee, instead of a get_value round-trip per log
+    user_ids = {str(l['user_id']) for l in logs}
+    emp_map = {
+        row.attendance_device_id: row
+        for row in frappe.get_all(
+            'Employee',
+            filters={'attendance_device_id': ['in', list(user_ids)]},
+            fields=['name', 'employee_name', 'status', 'attendance_device_id']
+        )
+    }
+
+    errors = []
+    pending = []
+    inactive_uids = set()
+
+    for i, log in enumerate(logs):
+        try:
+            # Normalize the timestamp once; it is reused for the dedup
+            # key and the insert tuple
+            ts = get_datetime(log['timestamp'])
+
+            # Map user_id to employee via the prefetched dict
+            emp_row = emp_map.get(str(log['user_id']))
+
+            if not emp_row:
+                errors.append(f"Employee not found for device ID: {log['user_id']}")
+                continue
+
+            employee = emp_row.name
+
+            # Check employee status (security enhancement); status and
+            # name come from the prefetched dict — no per-log get_doc
+            if emp_row.status != 'Active':
+                # Employee is inactive (Left, Suspended, etc.)
+                error_msg = f"Rejected punch from inactive employee: {emp_row.employee_name} (ID: {log['user_id']}, Status: {emp_row.status})"
+                errors.append(error_msg)
+                frappe.logger().warning(error_msg)
+
+                # Deletion is deferred to one batch after the sync
+                inactive_uids.add(log['user_id'])
+                continue
+
+            # Determine log type based on status (default to IN for
+            # unknown codes)
+            log_type = STATUS_TO_LOG_TYPE.get(log['status'], 'IN')
+
+            # Accumulate for bulk insert; INSERT IGNORE drops rows the
+            # unique key already holds, so no existence check here
+            pending.append((employee, ts, log_type, device_ip))
+
+        except Exception as e:
+            # Collected only; the caller writes one aggregated Error Log
+            # for the whole sync instead of an insert per bad row
+            errors.append(f"Error processing log {i}: {str(e)}")
+
+    synced_count = _flush_checkins(pending)
+
+    return synced_count, errors, inactive_uids
+
 
 class ZKTecoConnector:
     """
@@ -20,32 +214,55 @@ class ZKTecoConnector:
     Supports multiple device models and protocols
     """
     
-    def __init__(self, device_ip, device_port=4370, timeout=10, password=None):
+    def __init__(self, device_ip, device_port=4370, timeout=10, password=None, force_udp=True):
         """
         Initialize connector
-        
+
         Args:
             device_ip: IP address of the ZKTeco device
             device_port: Port number (default 4370)
             timeout: Connection timeout in seconds
             password: Device communication password (optional)
+            force_udp: Connect over UDP; TCP on port 4370 goes through a
+                multi-attempt retry/fallback cycle that adds seconds per
+                connect, so UDP is the default
         """
         self.device_ip = device_ip
         self.device_port = device_port
         self.timeout = timeout
         self.password = password or 0
+        self.force_udp = bool(force_udp)
         self.zk = None
         self.conn = None
-    
+
     def connect(self):
-        """Connect to the ZKTeco device"""
+        """Connect to the ZKTeco device, reusing a pooled connection if fresh"""
+        pooled = _CONN_POOL.pop((self.device_ip, self.device_port), None)
+        if pooled:
+            conn, ts = pooled
+            if time.time() - ts < _CONN_POOL_TTL:
+                # Ping before reuse: a sync that died mid-download parks
+                # its dead socket in the pool, and handing that back
+                # would just fail the retry too
+                try:
+                    conn.get_time()
+                    self.conn = conn
+                    return True
+                except Exception:
+                    pass
+            try:
+                conn.disconnect()
+            except Exception:
+                pass
+
         try:
             # Create ZK instance
             self.zk = ZK(
-                self.device_ip, 
-                port=self.device_port, 
+                self.device_ip,
+                port=self.device_port,
                 timeout=self.timeout,
-                password=self.password
+                password=self.password,
+                force_udp=self.force_udp
             )
             
             # Connect to device
@@ -58,23 +275,54 @@ class ZKTecoConnector:
             return False
             
         except Exception as e:
-            frappe.log_error(f"ZKTeco Connection Error: {str(e)}", "ZKTeco Connector")
-            frappe.logger().error(f"Failed to connect to {self.device_ip}: {str(e)}")
+            # Routine: offline devices recur every scheduled tick
+            _log_fail(f"Failed to connect to {self.device_ip}: {str(e)}", "ZKTeco Connector")
             return False
     
     def disconnect(self):
-        """Disconnect from the device"""
+        """Return the connection to the pool instead of closing it"""
         try:
             if self.conn:
-                self.conn.disconnect()
-                frappe.logger().info(f"Disconnected from {self.device_ip}")
+                _CONN_POOL[(self.device_ip, self.device_port)] = (self.conn, time.time())
+                self.conn = None
+            _evict_stale_connections()
         except Exception as e:
             frappe.logger().warning(f"Error during disconnect: {str(e)}")
     
+    def get_device_info_light(self):
+        """
+        Get device identity and counts without payload downloads
+
+        read_sizes() fills the user/record counters from device
+        metadata, so this never pulls the full user or attendance
+        tables the way get_device_info does.
+
+        Returns:
+            dict: Device information including model, firmware, counts
+        """
+        try:
+            if not self.conn:
+                return None
+
+            self.conn.read_sizes()
+
+            return {
+                'serial_number': self.conn.get_serialnumber(),
+                'firmware_version': self.conn.get_firmware_version(),
+                'platform': self.conn.get_platform(),
+                'device_name': self.conn.get_device_name(),
+                'user_count': self.conn.users,
+                'attendance_count': self.conn.records
+            }
+
+        except Exception as e:
+            frappe.log_error(f"Error getting device info: {str(e)}", "ZKTeco Connector")
+            return None
+
     def get_device_info(self):
         """
         Get device information
-        
+
         Returns:
             dict: Device information including model, firmware, etc.
         """
@@ -99,36 +347,56 @@ class ZKTecoConnector:
             frappe.log_error(f"Error getting device info: {str(e)}", "ZKTeco Connector")
             return None
     
-    def get_attendance_logs(self):
+    def iter_attendance_logs(self, quiesce=False):
         """
-        Fetch attendance logs from the device
-        
-        Returns:
-            list: List of attendance records
+        Stream attendance records from the device one dict at a time
+
+        Avoids building a second full list of dicts on top of the list
+        pyzk materializes for the download; sync_device consumes this in
+        chunks so inserts start before the whole table is converted.
+
+        quiesce: put the device into maintenance mode for the download
+        (disable_device/enable_device). The firmware serves the transfer
+        noticeably faster when it is not also handling badge traffic,
+        but punches are rejected meanwhile — opt in only where a brief
+        outage is acceptable.
+
+        Yields:
+            dict: One attendance record per iteration
         """
+        if not self.conn:
+            return
+
+        if quiesce:
+            self.conn.disable_device()
         try:
-            if not self.conn:
-                return []
-            
-            # Get attendance records from device
-            attendances = self.conn.get_attendance()
-            
-            logs = []
-            for att in attendances:
-                logs.append({
+            for att in self.conn.get_attendance():
+                yield {
                     'user_id': att.user_id,
                     'timestamp': att.timestamp,
                     'status': att.status,  # 0=Check-In, 1=Check-Out, 2=Break-Out, 3=Break-In, 4=OT-In, 5=OT-Out
                     'punch': att.punch,  # Punch type
                     'uid': att.uid  # Unique ID
-                })
-            
+                }
+        finally:
+            if quiesce:
+                self.conn.enable_device()
+
+    def get_attendance_logs(self, quiesce=False):
+        """
+        Fetch attendance logs from the device
+
+        Returns:
+            list: List of attendance records
+        """
+        try:
+            logs = list(self.iter_attendance_logs(quiesce=quiesce))
+
             frappe.logger().info(f"Retrieved {len(logs)} attendance records from {self.device_ip}")
             return logs
-            
+
         except Exception as e:
-            frappe.log_error(f"Error fetching logs: {str(e)}", "ZKTeco Connector")
-            frappe.logger().error(f"Failed to fetch logs from {self.device_ip}: {str(e)}")
+            _log_fail(f"Failed to fetch logs from {self.device_ip}: {str(e)}", "ZKTeco Connector", severe=True)
             return []
     
     def clear_attendance_logs(self):
@@ -152,22 +420,54 @@ class ZKTecoConnector:
         except Exception as e:
             frappe.log_error(f"Error deleting user: {str(e)}", "ZKTeco Connector")
             return False
-    
+
+    def delete_users_batch(self, user_ids):
+        """
+        Delete several users from the device in one pass, amortizing a
+        single disable/enable pair over all deletions
+        """
+        if not self.conn or not user_ids:
+            return
+
+        try:
+            self.conn.disable_device()
+            try:
+                for user_id in user_ids:
+                    try:
+                        self.conn.delete_user(uid=user_id)
+                    except Exception as e:
+                        _log_fail(
+                            f"Failed to delete user {user_id}: {str(e)}",
+                            "ZKTeco Connector"
+                        )
+            finally:
+                self.conn.enable_device()
+            frappe.logger().info(
+                f"Deleted {len(user_ids)} inactive user(s) from device {self.device_ip}"
+            )
+        except Exception as e:
+            _log_fail(
+                f"Error batch-deleting users: {str(e)}",
+                "ZKTeco Connector", severe=True
+            )
+
     @staticmethod
-    def sync_device(device_ip, device_port=4370, clear_after_sync=False, auto_delete_inactive=False):
+    def sync_device(device_ip, device_port=4370, clear_after_sync=False, auto_delete_inactive=False, force_udp=True, quiesce=False):
         """
         Sync attendance data from a ZKTeco device
-        
+
         Args:
             device_ip: IP address of the device
             device_port: Port number
             clear_after_sync: Whether to clear device logs after successful sync
             auto_delete_inactive: Whether to automatically delete inactive employees from device
-            
+            force_udp: Connect over UDP (see ZKTecoConnector.__init__)
+            quiesce: Disable the device during the download (see iter_attendance_logs)
+
         Returns:
             dict: Sync results
         """
-        connector = ZKTecoConnector(device_ip, device_port)
+        connector = ZKTecoConnector(device_ip, device_port, force_udp=force_udp)
         
         if not connector.connect():
             return {
@@ -176,8 +476,9 @@ class ZKTecoConnector:
             }
         
         try:
-            # Get device info for logging
-            device_info = connector.get_device_info()
+            # Get device info for logging (light variant: counts come
+            # from read_sizes, not full table downloads)
+            device_info = connector.get_device_info_light()
             if device_info:
                 frappe.logger().info(
                     f"Device Info - Model: {device_info.get('platform')}, "
@@ -186,105 +487,102 @@ class ZKTecoConnector:
                     f"Records: {device_info.get('attendance_count')}"
                 )
             
-            # Get attendance logs
-            logs = connector.get_attendance_logs()
-            
-            if not logs:
+            # Producer/consumer pipeline: a reader thread pulls records
+            # off the device into a bounded queue while this thread does
+            # the DB work, so network and DB time overlap instead of
+            # stacking. Memory stays bounded by the queue + chunk size.
+            log_queue = queue.Queue(maxsize=5000)
+            read_errors = []
+
+            def _read_device():
+                # No frappe calls in here: frappe.local is thread-local
+                # and this thread has no site context
+                try:
+                    for record in connector.iter_attendance_logs(quiesce=quiesce):
+                        log_queue.put(record)
+                except Exception as e:
+                    read_errors.append(f"Device read failed: {str(e)}")
+                finally:
+                    log_queue.put(None)
+
+            reader = threading.Thread(target=_read_device, daemon=True)
+            reader.start()
+
+            synced_count = 0
+            total_logs = 0
+            errors = []
+            inactive_uids = set()
+            drained = False
+
+            while not drained:
+                chunk = []
+                while len(chunk) < CHECKIN_INSERT_CHUNK:
+                    record = log_queue.get()
+                    if record is None:
+                        drained = True
+                        break
+                    chunk.append(record)
+
+                if not chunk:
+                    break
+
+                total_logs += len(chunk)
+
+                # Savepoint per chunk: a bad chunk rolls back alone
+                frappe.db.savepoint('sync_chunk')
+                try:
+                    synced, chunk_errors, chunk_inactive = _sync_log_chunk(chunk, device_ip)
+                except Exception as e:
+                    frappe.db.rollback(save_point='sync_chunk')
+                    errors.append(f"Chunk failed after {total_logs} records: {str(e)}")
+                    frappe.log_error(frappe.get_traceback(), f"Sync Chunk Error - Device {device_ip}")
+                    continue
+
+                # Commit per chunk: _flush_checkins bumps the shared
+                # tabSeries row, and InnoDB keeps that row lock until
+                # commit — holding it for a whole device download would
+                # serialize the parallel per-device sync threads (and
+                # time the second one out) on one series row
+                frappe.db.commit()
+
+                synced_count += synced
+                errors.extend(chunk_errors)
+                inactive_uids.update(chunk_inactive)
+                frappe.logger().info(f"Processed {total_logs} records")
+
+            reader.join()
+            errors.extend(read_errors)
+
+            # Device mutations happen once, after the sync: one
+            # disable/enable pair around all deletions instead of a UDP
+            # round-trip per rejected punch
+            if auto_delete_inactive and inactive_uids:
+                connector.delete_users_batch(inactive_uids)
+
+            if errors:
+                # One Error Log insert covering every failed row
+                frappe.log_error("\n".join(errors[:200]), f"Sync Errors - Device {device_ip}")
+
+            # Flush any trailing writes (aggregated Error Log)
+            frappe.db.commit()
+
+            if not total_logs:
                 return {
                     'success': True,
                     'message': 'No new attendance logs found',
                     'synced': 0,
                     'device_info': device_info
                 }
-            
-            synced_count = 0
-            errors = []
-            BATCH_SIZE = 100  # Commit every 100 records
-            
-            for i, log in enumerate(logs):
-                try:
-                    # Map user_id to employee
-                    employee = frappe.db.get_value(
-                        'Employee',
-                        {'attendance_device_id': str(log['user_id'])},
-                        'name'
-                    )
-                    
-                    if not employee:
-                        errors.append(f"Employee not found for device ID: {log['user_id']}")
-                        continue
-                    
-                    # Check employee status (NEW: Security Enhancement)
-                    employee_doc = frappe.get_doc('Employee', employee)
-                    
-                    if employee_doc.status != 'Active':
-                        # Employee is inactive (Left, Suspended, etc.)
-                        error_msg = f"Rejected punch from inactive employee: {employee_doc.employee_name} (ID: {log['user_id']}, Status: {employee_doc.status})"
-                        errors.append(error_msg)
-                        frappe.logger().warning(error_msg)
-                        
-                        # Optionally delete user from device
-                        if auto_delete_inactive:
-                            try:
-                                connector.delete_user_from_device(log['user_id'])
-                                frappe.logger().info(f"Auto-deleted inactive user {log['user_id']} from device {device_ip}")
-                            except Exception as e:
-                                frappe.logger().error(f"Failed to auto-delete user {log['user_id']}: {str(e)}")
-                        
-                        continue
-                    
-                    # Determine log type based on status
-                    # Status: 0=Check-In, 1=Check-Out, 2=Break-Out, 3=Break-In, 4=OT-In, 5=OT-Out
-                    if log['status'] in [0, 3, 4]:  # Check-In, Break-In, OT-In
-                        log_type = 'IN'
-                    elif log['status'] in [1, 2, 5]:  # Check-Out, Break-Out, OT-Out
-                        log_type = 'OUT'
-                    else:
-                        log_type = 'IN'  # Default to IN
-                    
-                    # Check if already exists
-                    exists = frappe.db.exists(
-                        'Employee Checkin',
-                        {
-                            'employee': employee,
-                            'time': log['timestamp'],
-                            'log_type': log_type
-                        }
-                    )
-                    
-                    if not exists:
-                        # Create Employee Checkin
-                        checkin = frappe.get_doc({
-                            'doctype': 'Employee Checkin',
-                            'employee': employee,
-                            'time': log['timestamp'],
-                            'log_type': log_type,
-                            'device_id': device_ip
-                        })
-                        checkin.insert(ignore_permissions=True)
-                        synced_count += 1
-                    
-                    # Batch commit every BATCH_SIZE records
-                    if (i + 1) % BATCH_SIZE == 0:
-                        frappe.db.commit()
-                        frappe.logger().info(f"Batch committed: {i + 1} records processed")
-                
-                except Exception as e:
-                    errors.append(f"Error processing log {i}: {str(e)}")
-                    frappe.log_error(str(e), f"Sync Log Error - Device {device_ip}")
-            
-            # Final commit for remaining records
-            frappe.db.commit()
-            
+
             # Clear device logs if requested and sync was successful
             if clear_after_sync and synced_count > 0:
                 connector.clear_attendance_logs()
-            
+
             return {
                 'success': True,
                 'message': f'Synced {synced_count} attendance logs',
                 'synced': synced_count,
-                'total_logs': len(logs),
+                'total_logs': total_logs,
                 'errors': errors if errors else None,
                 'device_info': device_info
             }
@@ -317,26 +615,96 @@ def sync_biometric_device(device_ip, device_port=4370, clear_after_sync=False, a
     return ZKTecoConnector.sync_device(device_ip, int(device_port), clear_after_sync, auto_delete_inactive)
 
 
+@redis_cache(ttl=600)
+def _get_enabled_devices():
+    """
+    Enabled device rows, cached in Redis so back-to-back scheduled syncs
+    skip the settings query; invalidated from the Biometric Device
+    Settings on_update hook.
+    """
+    return frappe.get_all(
+        'Biometric Device Settings',
+        filters={'enabled': 1},
+        fields=['name', 'device_ip', 'device_port', 'auto_delete_inactive_users', 'force_udp']
+    )
+
+
+def clear_device_cache(doc=None, method=None):
+    """doc_events hook: drop the cached device list on any settings change"""
+    _get_enabled_devices.clear_cache()
+
+
+def _sync_one_device(site, device, clear_after_sync, auto_delete_inactive):
+    """
+    Thread worker: sync a single device on its own Frappe connection.
+
+    frappe.local is thread-local, so each worker has to initialize the
+    site and open a DB connection of its own, released in finally.
+    """
+    frappe.init(site=site)
+    frappe.connect()
+    try:
+        # Use device-specific setting if available, otherwise use parameter
+        device_auto_delete = device.get('auto_delete_inactive_users', 0) or auto_delete_inactive
+
+        return ZKTecoConnector.sync_device(
+            device.device_ip,
+            device.device_port,
+            clear_after_sync,
+            device_auto_delete,
+            force_udp=device.get('force_udp', 1)
+        )
+    finally:
+        frappe.destroy()
+
+
 @frappe.whitelist()
 def sync_all_devices(clear_after_sync=False, auto_delete_inactive=False):
     """
-    Sync all configured biometric devices
-    
+    Queue a sync of all configured biometric devices
+
+    Runs on the long queue so the web worker is freed immediately
+    instead of blocking for the whole multi-device sync; poll
+    get_sync_status with the returned job id for progress.
+
     Args:
         clear_after_sync: Whether to clear device logs after successful sync
         auto_delete_inactive: Whether to automatically delete inactive employees from device
-    
+
+    Returns:
+        dict: Queued job id
+    """
+    job = frappe.enqueue(
+        'advanced_attendance.zkteco_connector._sync_all_devices_job',
+        queue='long',
+        timeout=3600,
+        clear_after_sync=clear_after_sync,
+        auto_delete_inactive=auto_delete_inactive
+    )
+    return {'queued': True, 'job_id': job.id}
+
+
+@frappe.whitelist()
+def get_sync_status(job_id):
+    """Return the queue status of a job started by sync_all_devices"""
+    return {'job_id': job_id, 'status': frappe.get_doc('RQ Job', job_id).status}
+
+
+def _sync_all_devices_job(clear_after_sync=False, auto_delete_inactive=False):
+    """
+    Sync all configured biometric devices (long-queue worker body)
+
+    Args:
+        clear_after_sync: Whether to clear device logs after successful sync
+        auto_delete_inactive: Whether to automatically delete inactive employees from device
+
     Returns:
         dict: Combined sync results
     """
     try:
-        # Get all enabled devices
-        devices = frappe.get_all(
-            'Biometric Device Settings',
-            filters={'enabled': 1},
-            fields=['name', 'device_ip', 'device_port', 'auto_delete_inactive_users']
-        )
-        
+        # Get all enabled devices (Redis-cached between syncs)
+        devices = _get_enabled_devices()
+
         if not devices:
             return {
                 'success': True,
@@ -344,36 +712,42 @@ def sync_all_devices(clear_after_sync=False, auto_delete_inactive=False):
                 'devices_synced': 0
             }
         
+        site = frappe.local.site
         results = []
         total_synced = 0
         errors = []
-        
-        for device in devices:
-            try:
-                # Use device-specific setting if available, otherwise use parameter
-                device_auto_delete = device.get('auto_delete_inactive_users', 0) or auto_delete_inactive
-                
-                result = ZKTecoConnector.sync_device(
-                    device.device_ip, 
-                    device.device_port,
-                    clear_after_sync,
-                    device_auto_delete
-                )
-                results.append({
-                    'device': device.name,
-                    'ip': device.device_ip,
-                    'result': result
-                })
-                
-                if result.get('success'):
-                    total_synced += result.get('synced', 0)
-                else:
-                    errors.append(f"{device.name}: {result.get('message', 'Unknown error')}")
-                    
-            except Exception as e:
-                error_msg = f"{device.name}: {str(e)}"
-                errors.append(error_msg)
-                frappe.log_error(frappe.get_traceback(), f"Sync failed for {device.name}")
+
+        # Device syncs stack blocking network round-trips to the boxes,
+        # so run them concurrently — wall clock drops from the sum of
+        # per-device times to the slowest device
+        with ThreadPoolExecutor(max_workers=len(devices)) as executor:
+            futures = {
+                executor.submit(
+                    _sync_one_device, site, device,
+                    clear_after_sync, auto_delete_inactive
+                ): device
+                for device in devices
+            }
+
+            for future in as_completed(futures):
+                device = futures[future]
+                try:
+                    result = future.result()
+                    results.append({
+                        'device': device.name,
+                        'ip': device.device_ip,
+                        'result': result
+                    })
+
+                    if result.get('success'):
+                        total_synced += result.get('synced', 0)
+                    else:
+                        errors.append(f"{device.name}: {result.get('message', 'Unknown error')}")
+
+                except Exception as e:
+                    error_msg = f"{device.name}: {str(e)}"
+                    errors.append(error_msg)
+                    frappe.log_error(frappe.get_traceback(), f"Sync failed for {device.name}")
         
         return {
             'success': True,